@@ -2,50 +2,219 @@
 
 """
 Create DuckDB database with Netflix dataset
+
+Accepts one or more CSV, Parquet or JSON files given as paths, globs,
+directories or a JSON manifest. Files are checked in a process pool,
+staged into separate tables in parallel, then unioned into netflix_shows
+in a single transaction so readers never see a half-loaded table.
 """
 
+import os
+import csv
+import glob
+import json
+import time
+import argparse
 import duckdb
-import pandas as pd
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+READERS = {
+    '.csv': "read_csv_auto('{path}', header=true, delim=',', quote='\"')",
+    '.parquet': "read_parquet('{path}')",
+    '.json': "read_json_auto('{path}')",
+    '.jsonl': "read_json_auto('{path}', format='newline_delimited')",
+    '.ndjson': "read_json_auto('{path}', format='newline_delimited')",
+}
+
+# Rating order used by the API's keyset pagination
+SORT_COLUMNS = ('imdb_score', 'imdb_votes', 'id')
+SORT_ORDER = "ORDER BY imdb_score DESC NULLS LAST, COALESCE(imdb_votes, 0) DESC, id DESC"
+
+def resolve_inputs(inputs, manifest=None):
+    """Expand paths, globs, directories and manifest entries into data files"""
+    patterns = list(inputs)
+    
+    if manifest:
+        manifest_path = Path(manifest)
+        with open(manifest_path) as f:
+            entries = json.load(f)
+        patterns += [
+            entry if Path(entry).is_absolute() else str(manifest_path.parent / entry)
+            for entry in entries
+        ]
+    
+    files = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = [str(child) for child in sorted(path.iterdir()) if child.suffix.lower() in READERS]
+        else:
+            matches = sorted(glob.glob(pattern)) or [pattern]
+        files += [match for match in matches if match not in files]
+    
+    return [Path(match) for match in files]
+
+def validate_file(path):
+    """Cheap structural checks, run in a worker process before anything is loaded"""
+    path = Path(path)
+    report = {'path': str(path), 'size': 0, 'columns': None, 'error': None}
+    
+    try:
+        suffix = path.suffix.lower()
+        if suffix not in READERS:
+            raise ValueError(f"unsupported file type '{suffix}'")
+        
+        report['size'] = path.stat().st_size
+        if report['size'] == 0:
+            raise ValueError("file is empty")
+        
+        if suffix == '.csv':
+            with open(path, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+            if not header:
+                raise ValueError("missing CSV header")
+            report['columns'] = header
+        elif suffix == '.parquet':
+            if report['size'] < 12:
+                raise ValueError("not a Parquet file")
+            with open(path, 'rb') as f:
+                head = f.read(4)
+                f.seek(-4, os.SEEK_END)
+                tail = f.read(4)
+            if head != b'PAR1' or tail != b'PAR1':
+                raise ValueError("not a Parquet file")
+        else:
+            with open(path, encoding='utf-8') as f:
+                first = f.read(1024).lstrip()[:1]
+            if first not in ('[', '{'):
+                raise ValueError("not a JSON file")
+    except Exception as e:
+        report['error'] = str(e)
+    
+    return report
 
-def create_netflix_duckdb():
+def stage_file(conn, index, path):
+    """Load one file into its own staging table using DuckDB's parallel readers"""
+    table = f"staging.file_{index}"
+    reader = READERS[path.suffix.lower()].format(path=str(path).replace("'", "''"))
+    
+    cursor = conn.cursor()
+    try:
+        start_time = time.perf_counter()
+        cursor.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM {reader}")
+        rows = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        seconds = time.perf_counter() - start_time
+    finally:
+        cursor.close()
+    
+    return {'table': table, 'rows': rows, 'seconds': seconds}
+
+def print_throughput(path, size, stats):
+    seconds = max(stats['seconds'], 1e-6)
+    megabytes = size / 1024 / 1024
+    print(f"   {path.name:<32} {stats['rows']:>10,} rows  {megabytes:>8.1f} MB  "
+          f"{stats['seconds']:>6.2f}s  {stats['rows'] / seconds:>12,.0f} rows/s  {megabytes / seconds:>7.1f} MB/s")
+
+def create_netflix_duckdb(inputs=None, manifest=None, db_path=None, workers=None):
     print("🦆 Creating Netflix DuckDB Database\n")
     
     # Set up paths
     project_root = Path(__file__).parent.parent
     data_dir = project_root / "data"
-    csv_path = data_dir / "netflix_imdb_dataset.csv"
-    db_path = data_dir / "netflix.duckdb"
+    db_path = Path(db_path) if db_path else data_dir / "netflix.duckdb"
+    workers = workers or os.cpu_count() or 4
     
-    if not csv_path.exists():
-        print(f"❌ CSV file not found: {csv_path}")
+    if not inputs and not manifest:
+        inputs = [str(data_dir / "netflix_imdb_dataset.csv")]
+    files = resolve_inputs(inputs or [], manifest)
+    
+    missing = [path for path in files if not path.exists()]
+    if not files or missing:
+        for path in missing:
+            print(f"❌ Input file not found: {path}")
+        if not files:
+            print("❌ No input files matched")
         print("Please run: python scripts/setup-netflix-dataset.py first")
         return False
     
-    print(f"📄 CSV file: {csv_path}")
+    print(f"📄 Input files: {len(files)}")
     print(f"🗃️  Database: {db_path}")
     
+    # Pre-validate every file in parallel before touching the database
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        reports = list(pool.map(validate_file, files))
+    
+    failed = [report for report in reports if report['error']]
+    if failed:
+        for report in failed:
+            print(f"❌ {report['path']}: {report['error']}")
+        return False
+    
+    headers = {tuple(report['columns']) for report in reports if report['columns']}
+    if len(headers) > 1:
+        print("⚠️  CSV headers differ between files; columns will be matched by name")
+    print(f"✅ Validated {len(files)} file(s), {sum(report['size'] for report in reports) / 1024 / 1024:.1f} MB total")
+    
     # Create DuckDB connection
     conn = duckdb.connect(str(db_path))
     print(f"✅ Connected to DuckDB database")
     
+    staged = []
     try:
-        # Drop table if exists
-        conn.execute("DROP TABLE IF EXISTS netflix_shows")
-        print("🗑️  Dropped existing table (if any)")
-        
-        # Create table and load data in one step using DuckDB's CSV reader
-        create_and_load_sql = f"""
-        CREATE TABLE netflix_shows AS 
-        SELECT * FROM read_csv_auto('{csv_path}', 
-            header=true, 
-            delim=',',
-            quote='"'
+        conn.execute("CREATE SCHEMA IF NOT EXISTS staging")
+        
+        # Stage files concurrently; each reader is itself multi-threaded
+        load_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(workers, len(files))) as pool:
+            futures = [pool.submit(stage_file, conn, index, path) for index, path in enumerate(files)]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                    staged.append(results[-1]['table'])
+                except Exception as e:
+                    results.append(e)
+        
+        errors = [(path, error) for path, error in zip(files, results) if isinstance(error, Exception)]
+        if errors:
+            for path, error in errors:
+                print(f"❌ Failed to stage {path}: {error}")
+            return False
+        
+        print(f"\n⏱️  Per-file throughput:")
+        for path, report, stats in zip(files, reports, results):
+            print_throughput(path, report['size'], stats)
+        
+        # Swap the new data in atomically; rows are written in rating order
+        # so the API's keyset pagination on (imdb_score, imdb_votes, id)
+        # reads neighbouring row groups.
+        union_sql = "\n            UNION ALL BY NAME\n            ".join(
+            f"SELECT * FROM {stats['table']}" for stats in results
         )
-        """
+        staged_columns = {row[0] for row in conn.execute(f"DESCRIBE {union_sql}").fetchall()}
+        order_sql = SORT_ORDER if set(SORT_COLUMNS) <= staged_columns else ""
+        
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            conn.execute(f"""
+            CREATE OR REPLACE TABLE netflix_shows AS
+            SELECT * FROM (
+            {union_sql}
+            )
+            {order_sql}
+            """)
+            for table in staged:
+                conn.execute(f"DROP TABLE {table}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        staged = []
         
-        conn.execute(create_and_load_sql)
-        print("📊 Created table and loaded data from CSV")
+        total_rows = sum(stats['rows'] for stats in results)
+        total_seconds = time.perf_counter() - load_start
+        print(f"\n📊 Committed {total_rows:,} rows from {len(files)} file(s) in {total_seconds:.2f}s")
         
         # Verify data loaded
         result = conn.execute("SELECT COUNT(*) as total_records FROM netflix_shows").fetchone()
@@ -119,13 +288,22 @@ def create_netflix_duckdb():
         return False
     
     finally:
+        for table in staged:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
         conn.close()
 
 if __name__ == "__main__":
     print("🎬 Netflix DuckDB Setup")
     print("=" * 30)
     
-    success = create_netflix_duckdb()
+    parser = argparse.ArgumentParser(description="Load CSV/Parquet/JSON files into netflix_shows")
+    parser.add_argument('inputs', nargs='*', help="files, globs or directories (default: data/netflix_imdb_dataset.csv)")
+    parser.add_argument('--manifest', help="JSON list of files or globs, relative to the manifest")
+    parser.add_argument('--db', help="DuckDB database path (default: data/netflix.duckdb)")
+    parser.add_argument('--workers', type=int, help="parallel validation/staging workers (default: CPU count)")
+    args = parser.parse_args()
+    
+    success = create_netflix_duckdb(args.inputs, args.manifest, args.db, args.workers)
     
     if success:
         print(f"\n✅ Setup complete! Next steps:")
@@ -52,6 +52,10 @@ def setup_netflix_dataset():
         shutil.copy2(netflix_csv, target_csv)
         print(f"✅ Dataset copied to: {target_csv}")
         
+        if len(csv_files) > 1:
+            print(f"ℹ️  {len(csv_files)} CSV files downloaded; load them all with:")
+            print(f"   python scripts/create-netflix-duckdb.py \"{dataset_path}\"")
+        
         # Analyze dataset structure
         print("\n📊 Analyzing dataset structure...")
         df = pd.read_csv(target_csv)
@@ -252,7 +256,7 @@ if __name__ == "__main__":
         print("\n🎉 Netflix dataset setup completed successfully!")
         print("\nNext steps:")
         print("1. Install DuckDB: pip install duckdb")
-        print("2. Run DuckDB setup: duckdb data/netflix.duckdb < data/setup_netflix_duckdb.sql")
+        print("2. Load DuckDB: python scripts/create-netflix-duckdb.py")
         print("3. Start services: node scripts/start-live-demo.js")
         print("4. Test analytics queries")
     else:
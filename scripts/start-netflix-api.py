@@ -5,48 +5,307 @@ Netflix Analytics API - Python FastAPI + DuckDB
 Real implementation of our DaaS query engine for testing services
 """
 
+import os
+import re
 import json
+import math
+import atexit
+import glob
+import base64
+import shutil
+import hashlib
+import uuid
+import time
+import random
+import fnmatch
+import threading
 import duckdb
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
-from flask import Flask, request, jsonify
+from datetime import date, datetime
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from werkzeug.datastructures import MultiDict
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
 
 # Create Flask app
 app = Flask(__name__)
 CORS(app)
 
-# Global database connection
-db_conn = None
+# Data source registry settings
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_DIR = Path(os.environ.get('DATA_DIR', PROJECT_ROOT / "data"))
+DATASOURCES_FILE = Path(os.environ.get('DATASOURCES_FILE', DATA_DIR / "datasources.json"))
+DATASOURCE_MAX_OPEN = int(os.environ.get('DATASOURCE_MAX_OPEN', 32))
+DATASOURCE_IDLE_TIMEOUT = float(os.environ.get('DATASOURCE_IDLE_TIMEOUT', 300))
+DATASOURCE_MEMORY_LIMIT = os.environ.get('DATASOURCE_MEMORY_LIMIT', '512MB')
+DATASOURCE_THREADS = int(os.environ.get('DATASOURCE_THREADS', 2))
+DEFAULT_DATA_SOURCE = 'netflix-duckdb'
+
+# Canned endpoint cache settings (seconds)
+CANNED_REFRESH_INTERVAL = float(os.environ.get('CANNED_REFRESH_INTERVAL', 30))
+CANNED_MAX_STALENESS = float(os.environ.get('CANNED_MAX_STALENESS', 300))
+CANNED_REFRESH_JITTER = float(os.environ.get('CANNED_REFRESH_JITTER', 0.2))
+CANNED_MAX_UNPINNED = int(os.environ.get('CANNED_MAX_UNPINNED', 100))
+
+# Persistent result store ('' disables it)
+RESULT_STORE_DIR = os.environ.get('RESULT_STORE_DIR', str(DATA_DIR / ".result-cache"))
+
+# Shared query cache settings, mirroring the query engine's CacheService
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 3600))
+MEMORY_CACHE_TTL = float(os.environ.get('MEMORY_CACHE_TTL', 5))
+MEMORY_CACHE_MAX_ENTRIES = int(os.environ.get('MEMORY_CACHE_MAX_ENTRIES', 1000))
+DEFAULT_TENANT_ID = os.environ.get('DEFAULT_TENANT_ID', 'default')
+CACHE_KEY_PREFIX = 'query:'
+
+# Keyset pagination settings
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 500))
+
+# Server-sent events push channel settings (seconds)
+SSE_HEARTBEAT_INTERVAL = float(os.environ.get('SSE_HEARTBEAT_INTERVAL', 15))
+
+# Data versions are per process; event ids carry this epoch so a client
+# resuming against a restarted or different worker gets a full snapshot
+BOOT_EPOCH = uuid.uuid4().hex[:12]
+
+SOURCE_TYPES = {'.duckdb': 'duckdb', '.csv': 'csv', '.parquet': 'parquet'}
 
-def get_db_connection():
-    """Get or create DuckDB connection"""
-    global db_conn
-    if db_conn is None:
-        project_root = Path(__file__).parent.parent
-        db_path = project_root / "data" / "netflix.duckdb"
+def discover_data_sources():
+    """Build data source definitions from DATA_DIR and DATASOURCES_FILE
+    
+    Every ``*.duckdb``, ``*.csv`` and ``*.parquet`` file in DATA_DIR becomes a
+    source with id ``<name>-<type>`` (so ``netflix.duckdb`` is
+    ``netflix-duckdb``). Entries in DATASOURCES_FILE are added on top and
+    win on id clashes; they look like::
+    
+        {"id": "acme-orders", "type": "parquet", "path": "/data/acme/*.parquet",
+         "table": "orders", "memoryLimit": "256MB", "threads": 1}
+    """
+    sources = {}
+    
+    if DATA_DIR.exists():
+        for path in sorted(DATA_DIR.iterdir()):
+            source_type = SOURCE_TYPES.get(path.suffix)
+            if source_type is None:
+                continue
+            source_id = f"{path.stem.replace('_', '-')}-{source_type}"
+            sources[source_id] = {'id': source_id, 'type': source_type, 'path': str(path)}
+    
+    if DATASOURCES_FILE.exists():
+        with open(DATASOURCES_FILE) as f:
+            for source in json.load(f):
+                path = Path(source['path'])
+                if not path.is_absolute():
+                    path = DATA_DIR / path
+                sources[source['id']] = {**source, 'path': str(path)}
+    
+    return sources
+
+class DataSourceRegistry:
+    """Lazily opened DuckDB handles, one per data source id.
+    
+    DuckDB files are opened read-only; CSV and Parquet sources get an
+    in-memory database with a view over the file(s). At most ``max_open``
+    handles stay open (least recently used are closed first) and handles
+    unused for ``idle_timeout`` seconds are closed, either on the next
+    acquire or by a background sweeper. Handles with queries in flight are
+    never closed. Sources are opened and closed outside the
+    registry lock, so a slow open only delays queries on that source.
+    """
+    
+    def __init__(self, sources, max_open, idle_timeout):
+        self.sources = sources
+        self.max_open = max_open
+        self.idle_timeout = idle_timeout
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._sweeper = None
+    
+    def _open(self, source):
+        config = {
+            'memory_limit': source.get('memoryLimit', DATASOURCE_MEMORY_LIMIT),
+            'threads': source.get('threads', DATASOURCE_THREADS),
+        }
+        
+        if source['type'] == 'duckdb':
+            if not Path(source['path']).exists():
+                raise Exception(f"Database not found: {source['path']}")
+            conn = duckdb.connect(source['path'], read_only=True, config=config)
+        elif source['type'] in ('csv', 'parquet'):
+            reader = 'read_csv_auto' if source['type'] == 'csv' else 'read_parquet'
+            table = source.get('table') or Path(source['path']).stem
+            path = source['path'].replace("'", "''")
+            conn = duckdb.connect(':memory:', config=config)
+            conn.execute(f"CREATE VIEW \"{table}\" AS SELECT * FROM {reader}('{path}')")
+        else:
+            raise Exception(f"Unsupported data source type: {source['type']}")
+        
+        print(f"✅ Opened data source {source['id']}: {source['path']}")
+        return conn
+    
+    def _close(self, closing):
+        for source_id, handle in closing:
+            handle['conn'].close()
+            print(f"💤 Closed data source {source_id}")
+    
+    def _evict(self, now, reserve):
+        """Detach idle and over-limit handles; the caller closes them unlocked"""
+        closing = [
+            (source_id, handle) for source_id, handle in self._handles.items()
+            if handle['in_use'] == 0 and now - handle['last_used'] > self.idle_timeout
+        ]
+        for source_id, _ in closing:
+            del self._handles[source_id]
+        
+        # OrderedDict keeps least recently used first
+        limit = self.max_open - 1 if reserve else self.max_open
+        for source_id in list(self._handles):
+            if len(self._handles) <= limit:
+                break
+            if self._handles[source_id]['in_use'] == 0:
+                closing.append((source_id, self._handles.pop(source_id)))
+        
+        return closing
+    
+    @contextmanager
+    def cursor(self, source_id):
+        """Yield a cursor on ``source_id``, opening the source if needed"""
+        if source_id not in self.sources:
+            raise KeyError(source_id)
         
-        if not db_path.exists():
-            raise Exception(f"Netflix database not found: {db_path}")
+        with self._lock:
+            now = time.monotonic()
+            handle = self._handles.get(source_id)
+            opening = handle is None
+            if opening:
+                # Placeholder so concurrent callers wait for this open
+                # instead of starting their own
+                closing = self._evict(now, reserve=True)
+                handle = {'conn': None, 'error': None, 'opened': threading.Event(), 'in_use': 0}
+                self._handles[source_id] = handle
+            else:
+                closing = []
+                self._handles.move_to_end(source_id)
+            handle['in_use'] += 1
+            handle['last_used'] = now
         
-        db_conn = duckdb.connect(str(db_path))
-        print(f"✅ Connected to Netflix database: {db_path}")
+        try:
+            self._close(closing)
+            
+            if opening:
+                try:
+                    handle['conn'] = self._open(self.sources[source_id])
+                except Exception as e:
+                    handle['error'] = e
+                    with self._lock:
+                        if self._handles.get(source_id) is handle:
+                            del self._handles[source_id]
+                    raise
+                finally:
+                    handle['opened'].set()
+            else:
+                handle['opened'].wait()
+                if handle['error'] is not None:
+                    raise handle['error']
+            
+            cursor = handle['conn'].cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+        finally:
+            with self._lock:
+                handle['in_use'] -= 1
+                handle['last_used'] = time.monotonic()
+    
+    def sweep(self):
+        """Close handles that have been idle longer than ``idle_timeout``"""
+        with self._lock:
+            closing = self._evict(time.monotonic(), reserve=False)
+        self._close(closing)
+    
+    def start(self):
+        """Start the background idle sweeper"""
+        if self._sweeper is None:
+            self._stopping.clear()
+            self._sweeper = threading.Thread(
+                target=self._run_sweeper, name='datasource-sweeper', daemon=True
+            )
+            self._sweeper.start()
+            atexit.register(self.stop)
+    
+    def stop(self):
+        if self._sweeper is not None:
+            self._stopping.set()
+            self._sweeper.join(timeout=10)
+            self._sweeper = None
+    
+    def _run_sweeper(self):
+        interval = max(1.0, min(self.idle_timeout / 2, 60.0))
+        while not self._stopping.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️  Data source sweep failed: {str(e)}")
     
-    return db_conn
+    def data_version(self, source_id):
+        """Fingerprint of the files behind ``source_id``
+        
+        Changes whenever any of them is rewritten, so results computed
+        against an older load can be told apart from current ones.
+        """
+        path = self.sources[source_id]['path']
+        stats = [
+            [match, os.stat(match).st_mtime_ns, os.stat(match).st_size]
+            for match in sorted(glob.glob(path)) or [path]
+            if os.path.exists(match)
+        ]
+        return hashlib.sha1(json.dumps(stats).encode()).hexdigest()[:16]
+    
+    def describe(self):
+        """Registered sources and whether each is currently open"""
+        with self._lock:
+            return [
+                {
+                    'id': source_id,
+                    'type': source['type'],
+                    'open': source_id in self._handles and self._handles[source_id]['conn'] is not None
+                }
+                for source_id, source in sorted(self.sources.items())
+            ]
+
+data_sources = DataSourceRegistry(discover_data_sources(), DATASOURCE_MAX_OPEN, DATASOURCE_IDLE_TIMEOUT)
 
-def execute_query_with_metrics(sql):
+def execute_query_with_metrics(sql, data_source_id=DEFAULT_DATA_SOURCE):
     """Execute SQL query and return results with performance metrics"""
     start_time = datetime.now()
     
     try:
-        conn = get_db_connection()
-        result = conn.execute(sql).fetchall()
+        # Each call gets its own cursor so request threads and the
+        # background refresher can query concurrently
+        with data_sources.cursor(data_source_id) as cursor:
+            result = cursor.execute(sql).fetchall()
+            
+            # Get column names
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
         
-        # Get column names
-        columns = [desc[0] for desc in conn.description] if conn.description else []
-        
-        # Convert to list of dictionaries
-        rows = [dict(zip(columns, row)) for row in result]
+        # Convert to list of dictionaries, encoded the way the shared cache
+        # stores them so a hit and a miss return identical values
+        rows = json.loads(js_json([dict(zip(columns, row)) for row in result]))
         
         end_time = datetime.now()
         execution_time = (end_time - start_time).total_seconds() * 1000  # milliseconds
@@ -65,6 +324,737 @@ def execute_query_with_metrics(sql):
     except Exception as e:
         raise Exception(f"Query execution failed: {str(e)}")
 
+def normalize_sql(sql):
+    """Collapse whitespace and case so equivalent SQL maps to one key"""
+    return ' '.join(sql.split()).lower()
+
+class CannedResultCache:
+    """In-memory stale-while-revalidate store for canned query results.
+    
+    Reads are served from memory while an entry is younger than
+    ``max_staleness``. A background scheduler re-runs each entry roughly
+    every ``refresh_interval`` seconds, jittered so entries don't all hit
+    the database at once. Unpinned entries nobody reads for
+    ``max_staleness`` seconds are dropped, and at most ``max_unpinned`` of
+    them are kept (least recently read go first).
+    
+    Every entry carries a data version taken from a cache-wide counter that
+    only advances when a refresh returns different rows, so subscribers can
+    wait on ``wait_for_change`` and resume from the last version they saw.
+    """
+    
+    def __init__(self, refresh_interval, max_staleness, jitter, max_unpinned):
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+        self.jitter = jitter
+        self.max_unpinned = max_unpinned
+        self._entries = {}
+        self._key_locks = {}
+        self._hot_queries = {}
+        self._watchers = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._scheduler = None
+        self.store = None
+    
+    def _next_refresh(self, now):
+        spread = self.refresh_interval * self.jitter
+        return now + self.refresh_interval + random.uniform(-spread, spread)
+    
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+    
+    def _fingerprint(self, result):
+        return hashlib.sha1(js_json(result['rows']).encode()).hexdigest()
+    
+    def _is_fresh(self, entry, now):
+        return entry is not None and now - entry['refreshed_at'] <= self.max_staleness
+    
+    def refresh(self, key, sql, pinned=False):
+        """Run the query now and store the result under ``key``"""
+        # Read through the shared tier so a fleet of workers runs each
+        # refresh roughly once per interval rather than once per worker
+        result = run_shared_query(sql, ttl=max(int(self.refresh_interval), 1))
+        fingerprint = self._fingerprint(result)
+        now = time.monotonic()
+        
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None and previous['fingerprint'] == fingerprint:
+                version = previous['version']
+            else:
+                self._version += 1
+                version = self._version
+                self._changed.notify_all()
+            
+            self._entries[key] = {
+                'sql': sql,
+                'result': result,
+                'refreshed_at': now,
+                'next_refresh': self._next_refresh(now),
+                'last_access': previous['last_access'] if previous else now,
+                'pinned': pinned or (previous is not None and previous['pinned']),
+                'fingerprint': fingerprint,
+                'version': version,
+            }
+        self._wakeup.set()
+        
+        if self.store is not None and (previous is None or previous['fingerprint'] != fingerprint):
+            try:
+                self.store.save(key, sql, result)
+            except Exception as e:
+                print(f"⚠️  Could not persist {key}: {str(e)}")
+        
+        return result
+    
+    def restore(self, key, sql, result):
+        """Seed ``key`` with a result persisted by an earlier process"""
+        now = time.monotonic()
+        with self._lock:
+            if key in self._entries:
+                return
+            self._version += 1
+            self._entries[key] = {
+                'sql': sql,
+                'result': result,
+                'refreshed_at': now,
+                'next_refresh': self._next_refresh(now),
+                'last_access': now,
+                'pinned': False,
+                'fingerprint': self._fingerprint(result),
+                'version': self._version,
+            }
+    
+    def register(self, key, sql):
+        """Load ``key`` unless already cached and keep it refreshed even when nobody reads it"""
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry['pinned'] = True
+                    return
+            self.refresh(key, sql, pinned=True)
+    
+    def register_hot_query(self, sql):
+        """Serve ``sql`` from the cache whenever it arrives via /api/query"""
+        key = f"sql:{normalize_sql(sql)}"
+        with self._lock:
+            self._hot_queries[normalize_sql(sql)] = key
+        self.register(key, sql)
+        return key
+    
+    def hot_query_key(self, sql):
+        """Cache key for a registered hot query, or None"""
+        with self._lock:
+            return self._hot_queries.get(normalize_sql(sql))
+    
+    def get(self, key, sql):
+        """Return the cached result for ``key``, running ``sql`` on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['last_access'] = now
+        
+        if not self._is_fresh(entry, now):
+            # Only one request per key runs the query; the rest wait for it
+            with self._key_lock(key):
+                with self._lock:
+                    entry = self._entries.get(key)
+                if not self._is_fresh(entry, time.monotonic()):
+                    return self.refresh(key, sql)
+        
+        age_ms = (time.monotonic() - entry['refreshed_at']) * 1000
+        return {
+            **entry['result'],
+            'metadata': {
+                **entry['result']['metadata'],
+                'cached': True,
+                'cacheAge': round(age_ms, 2),
+                'dataVersion': entry['version']
+            }
+        }
+    
+    def watch(self, keys):
+        """Keep ``keys`` refreshed for as long as a subscriber is attached"""
+        with self._lock:
+            for key in keys:
+                self._watchers[key] = self._watchers.get(key, 0) + 1
+    
+    def unwatch(self, keys):
+        with self._lock:
+            for key in keys:
+                self._watchers[key] -= 1
+                if self._watchers[key] <= 0:
+                    del self._watchers[key]
+    
+    def changes_since(self, keys, version):
+        """Entries among ``keys`` whose data version is newer than ``version``
+        
+        Returns the current cache-wide version and a ``{key: (version, result)}``
+        mapping of the changed entries.
+        """
+        with self._lock:
+            changed = {
+                key: (self._entries[key]['version'], self._entries[key]['result'])
+                for key in keys
+                if key in self._entries and self._entries[key]['version'] > version
+            }
+            return self._version, changed
+    
+    def wait_for_change(self, version, timeout):
+        """Block until the cache-wide version moves past ``version``"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self._version > version, timeout=timeout)
+    
+    def start(self):
+        """Start the background refresh scheduler"""
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(
+                target=self._run_scheduler, name='canned-refresher', daemon=True
+            )
+            self._scheduler.start()
+            atexit.register(self.stop)
+    
+    def stop(self):
+        """Stop the scheduler, letting an in-flight refresh finish"""
+        if self._scheduler is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._scheduler.join(timeout=10)
+            self._scheduler = None
+    
+    def _run_scheduler(self):
+        while not self._stopping.is_set():
+            now = time.monotonic()
+            with self._lock:
+                unpinned = sorted(
+                    (entry['last_access'], key) for key, entry in self._entries.items()
+                    if not entry['pinned'] and key not in self._watchers
+                )
+                excess = max(len(unpinned) - self.max_unpinned, 0)
+                evicted = [
+                    (key, self._entries[key]['sql'])
+                    for index, (last_access, key) in enumerate(unpinned)
+                    if index < excess or now - last_access > self.max_staleness
+                ]
+                for key, _ in evicted:
+                    del self._entries[key]
+                    self._key_locks.pop(key, None)
+                
+                due = [
+                    (key, entry['sql']) for key, entry in self._entries.items()
+                    if entry['next_refresh'] <= now
+                ]
+            
+            if self.store is not None:
+                for key, sql in evicted:
+                    try:
+                        self.store.discard(sql)
+                    except Exception as e:
+                        print(f"⚠️  Could not remove persisted {key}: {str(e)}")
+            
+            for key, sql in due:
+                if self._stopping.is_set():
+                    return
+                try:
+                    with self._key_lock(key):
+                        self.refresh(key, sql)
+                except Exception as e:
+                    print(f"⚠️  Background refresh failed for {key}: {str(e)}")
+                    with self._lock:
+                        if key in self._entries:
+                            self._entries[key]['next_refresh'] = self._next_refresh(time.monotonic())
+            
+            with self._lock:
+                next_wake = min(
+                    (entry['next_refresh'] for entry in self._entries.values()),
+                    default=time.monotonic() + self.refresh_interval
+                )
+            self._wakeup.wait(max(0.5, next_wake - time.monotonic()))
+            self._wakeup.clear()
+
+class ResultStore:
+    """Canned results persisted as Arrow IPC files for warm restarts.
+    
+    Files live at ``<root>/<source id>/<data version>/<query fingerprint>.arrow``.
+    A restarted worker memory-maps the files for the current data version
+    and serves them straight away; directories for other data versions are
+    deleted at startup.
+    """
+    
+    def __init__(self, root, source_id):
+        self.root = Path(root)
+        self.source_id = source_id
+    
+    def _version_dir(self):
+        return self.root / self.source_id / data_sources.data_version(self.source_id)
+    
+    def _path(self, version_dir, sql):
+        return version_dir / f"{hashlib.sha1(normalize_sql(sql).encode()).hexdigest()}.arrow"
+    
+    def save(self, key, sql, result):
+        """Write ``result`` atomically so a crash never leaves a torn file"""
+        version_dir = self._version_dir()
+        version_dir.mkdir(parents=True, exist_ok=True)
+        
+        table = pa.Table.from_pylist(result['rows']).replace_schema_metadata({
+            'key': key,
+            'sql': sql,
+            'columns': json.dumps(result['columns']),
+            'metadata': json.dumps(result['metadata'], default=str),
+        })
+        
+        path = self._path(version_dir, sql)
+        tmp_path = path.with_suffix('.tmp')
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+    
+    def discard(self, sql):
+        """Remove the stored result for ``sql``, if any"""
+        self._path(self._version_dir(), sql).unlink(missing_ok=True)
+    
+    def load(self):
+        """Yield (key, sql, result) for every result stored for the current data version"""
+        version_dir = self._version_dir()
+        if not version_dir.exists():
+            return
+        
+        for path in sorted(version_dir.glob('*.arrow')):
+            try:
+                with pa.memory_map(str(path)) as source:
+                    table = pa.ipc.open_file(source).read_all()
+                metadata = {k.decode(): v.decode() for k, v in table.schema.metadata.items()}
+                rows = json.loads(js_json(table.to_pylist()))
+                yield metadata['key'], metadata['sql'], {
+                    'rows': rows,
+                    'columns': json.loads(metadata['columns']),
+                    'metadata': {**json.loads(metadata['metadata']), 'rowCount': len(rows)}
+                }
+            except Exception as e:
+                print(f"⚠️  Skipping unreadable cached result {path.name}: {str(e)}")
+    
+    def collect_garbage(self):
+        """Delete results stored for data versions other than the current one"""
+        source_dir = self.root / self.source_id
+        if not source_dir.exists():
+            return 0
+        
+        current = self._version_dir()
+        stale = [path for path in source_dir.iterdir() if path.is_dir() and path != current]
+        for path in stale:
+            shutil.rmtree(path, ignore_errors=True)
+        return len(stale)
+
+def js_simple_hash(text):
+    """Port of CacheService.simpleHash: 32-bit string hash over UTF-16 code units, base 36"""
+    def to_int32(value):
+        return (value + 2**31) % 2**32 - 2**31
+    
+    encoded = text.encode('utf-16-le')
+    hash_value = 0
+    for index in range(0, len(encoded), 2):
+        char = encoded[index] | (encoded[index + 1] << 8)
+        hash_value = to_int32((to_int32(hash_value << 5) - hash_value) + char)
+    
+    number = abs(hash_value)
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    encoded_hash = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        encoded_hash = digits[remainder] + encoded_hash
+        if number == 0:
+            return encoded_hash
+
+def js_json_value(value):
+    """Coerce a value so json.dumps renders it the way JSON.stringify does
+    
+    Integral floats lose their ``.0``, NaN and infinities become null and
+    dates use ISO 8601.
+    """
+    if isinstance(value, float):
+        if value != value or value in (float('inf'), float('-inf')):
+            return None
+        if value.is_integer():
+            return int(value)
+        return value
+    if isinstance(value, dict):
+        return {str(k): js_json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [js_json_value(v) for v in value]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def js_json(value):
+    """JSON text in JSON.stringify's compact form"""
+    return json.dumps(js_json_value(value), separators=(',', ':'), ensure_ascii=False, default=str)
+
+class TwoTierCache:
+    """Per-process memory tier in front of a shared Redis tier.
+    
+    Keys, values and TTLs follow the query engine's CacheService, so the
+    Python API and the Node services read each other's entries:
+    ``query:<simpleHash>`` keys, JSON result bodies written with SETEX,
+    and ``cache:hits`` / ``cache:sets`` counters. The memory tier keeps an
+    entry for at most ``memory_ttl`` seconds so invalidations made by
+    other workers are picked up quickly. Without a Redis client only the
+    memory tier is used. Any redis-py compatible client works, including
+    an in-process stand-in such as fakeredis.
+    """
+    
+    def __init__(self, client, default_ttl, memory_ttl, memory_max_entries):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.memory_ttl = memory_ttl
+        self.memory_max_entries = memory_max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def generate_cache_key(tenant_id, data_source_id, sql, parameters=None):
+        """Same derivation as CacheService.generateCacheKey"""
+        normalized_sql = re.sub(r'\s+', ' ', sql).strip().lower()
+        parameters_str = js_json(parameters) if parameters is not None else ''
+        content = f"{tenant_id}:{data_source_id}:{normalized_sql}:{parameters_str}"
+        
+        return f"{CACHE_KEY_PREFIX}{js_simple_hash(content)}"
+    
+    def _remember(self, key, result, ttl):
+        with self._lock:
+            self._memory[key] = (time.monotonic() + min(self.memory_ttl, ttl), result)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_max_entries:
+                self._memory.popitem(last=False)
+    
+    def _recall(self, key):
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is None:
+                return None
+            if cached[0] < time.monotonic():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return cached[1]
+    
+    def get_many(self, keys):
+        """Look up ``keys``; shared-tier misses from memory are fetched in one pipeline"""
+        found = {}
+        missing = []
+        for key in keys:
+            result = self._recall(key)
+            if result is not None:
+                found[key] = result
+            else:
+                missing.append(key)
+        
+        if not missing or self.client is None:
+            return found
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key in missing:
+                pipe.get(key)
+                pipe.ttl(key)
+            replies = pipe.execute()
+            
+            hits = 0
+            for index, key in enumerate(missing):
+                value, ttl = replies[2 * index], replies[2 * index + 1]
+                if value is None:
+                    continue
+                result = json.loads(value)
+                found[key] = result
+                hits += 1
+                self._remember(key, result, ttl if ttl and ttl > 0 else self.default_ttl)
+            
+            if hits:
+                self.client.incrby('cache:hits', hits)
+        except Exception as e:
+            print(f"⚠️  Cache get error: {str(e)}")
+        
+        return found
+    
+    def get(self, key):
+        return self.get_many([key]).get(key)
+    
+    def set_many(self, items, ttl=None):
+        """Store ``{key: result}`` in both tiers, writing to Redis in one pipeline"""
+        ttl = ttl or self.default_ttl
+        for key, result in items.items():
+            self._remember(key, result, ttl)
+        
+        if self.client is None or not items:
+            return
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, result in items.items():
+                pipe.setex(key, ttl, js_json(result))
+            pipe.incrby('cache:sets', len(items))
+            pipe.execute()
+        except Exception as e:
+            print(f"⚠️  Cache set error: {str(e)}")
+    
+    def set(self, key, result, ttl=None):
+        self.set_many({key: result}, ttl)
+    
+    def invalidate_pattern(self, pattern):
+        """Delete keys matching a Redis glob ``pattern`` from both tiers
+        
+        Only query results can be invalidated: the pattern must start with
+        ``query:`` so it can't reach the hit counters or other data that
+        shares the Redis database.
+        """
+        if not pattern.startswith(CACHE_KEY_PREFIX):
+            raise ValueError(f'pattern must start with "{CACHE_KEY_PREFIX}"')
+        
+        with self._lock:
+            local = [key for key in self._memory if fnmatch.fnmatchcase(key, pattern)]
+            for key in local:
+                del self._memory[key]
+        
+        if self.client is None:
+            return len(local)
+        
+        deleted = 0
+        try:
+            batch = []
+            for key in self.client.scan_iter(match=pattern, count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    deleted += self.client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += self.client.delete(*batch)
+            print(f"🗑️  Cache invalidated: {pattern} ({deleted} keys)")
+        except Exception as e:
+            print(f"⚠️  Cache invalidation error: {str(e)}")
+        
+        return deleted
+    
+    def stats(self):
+        """Hit/set counters shared with CacheService, plus the local tier size"""
+        stats = {'hits': 0, 'sets': 0, 'memoryEntries': len(self._memory), 'shared': self.client is not None}
+        if self.client is not None:
+            try:
+                hits, sets = self.client.mget('cache:hits', 'cache:sets')
+                stats['hits'], stats['sets'] = int(hits or 0), int(sets or 0)
+            except Exception as e:
+                print(f"⚠️  Cache stats error: {str(e)}")
+        return stats
+
+def create_shared_cache():
+    """Two-tier cache backed by REDIS_URL when configured and redis is installed"""
+    client = None
+    if REDIS_URL:
+        if redis is None:
+            print("⚠️  redis package not installed; using the in-process cache tier only")
+        else:
+            client = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+    
+    return TwoTierCache(client, CACHE_DEFAULT_TTL, MEMORY_CACHE_TTL, MEMORY_CACHE_MAX_ENTRIES)
+
+shared_cache = create_shared_cache()
+
+def run_shared_query(sql, data_source_id=DEFAULT_DATA_SOURCE, tenant_id=DEFAULT_TENANT_ID, parameters=None, ttl=None):
+    """Execute ``sql`` through the shared cache, storing misses for other workers"""
+    cache_key = TwoTierCache.generate_cache_key(tenant_id, data_source_id, sql, parameters)
+    
+    cached = shared_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, 'metadata': {**cached['metadata'], 'cached': True, 'cacheKey': cache_key}}
+    
+    result = execute_query_with_metrics(sql, data_source_id)
+    shared_cache.set(cache_key, result, ttl)
+    return result
+
+canned_cache = CannedResultCache(
+    CANNED_REFRESH_INTERVAL, CANNED_MAX_STALENESS, CANNED_REFRESH_JITTER, CANNED_MAX_UNPINNED
+)
+
+def load_hot_queries():
+    """Read the list of hot SQL queries to keep warm, if configured"""
+    hot_queries_path = Path(os.environ.get('HOT_QUERIES_FILE', DATA_DIR / "hot_queries.json"))
+    
+    if not hot_queries_path.exists():
+        return []
+    
+    with open(hot_queries_path) as f:
+        return json.load(f)
+
+def point_budget(data):
+    """Largest number of points the client can draw, or None for no limit
+    
+    Taken from ``maxPoints`` and/or ``pixelWidth`` in the request body; when
+    both are given the smaller one wins.
+    """
+    limits = []
+    for field in ('maxPoints', 'pixelWidth'):
+        value = data.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f'{field} must be a positive integer')
+        limits.append(value)
+    return min(limits) if limits else None
+
+def series_x(value, index):
+    """Numeric x coordinate for LTTB; non-numeric axes fall back to row order"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        # Dates and timestamps arrive as ISO 8601 text
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return float(index)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time()).timestamp()
+    return float(index)
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling
+    
+    Returns the indexes of ``threshold`` points from ``points`` (a list of
+    (x, y) pairs sorted by x) that best preserve the visual shape of the line.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    anchor = 0
+    
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n)
+        
+        # Average of the following bucket is the third corner of the triangle
+        following = points[end:next_end]
+        avg_x = sum(x for x, _ in following) / len(following)
+        avg_y = sum(y for _, y in following) / len(following)
+        
+        anchor_x, anchor_y = points[anchor]
+        best, best_area = start, -1.0
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((anchor_x - avg_x) * (y - anchor_y) - (anchor_x - x) * (avg_y - anchor_y))
+            if area > best_area:
+                best, best_area = index, area
+        
+        selected.append(best)
+        anchor = best
+    
+    selected.append(n - 1)
+    return selected
+
+def downsample_series(result, x_field, y_field, max_points):
+    """Reduce a line chart result to at most ``max_points`` rows with LTTB"""
+    columns = [column['name'] for column in result['columns']]
+    x_field = x_field or (columns[0] if columns else None)
+    y_field = y_field or (columns[1] if len(columns) > 1 else None)
+    if x_field not in columns or y_field not in columns:
+        raise ValueError('xAxis and yAxis must name columns of the query result')
+    
+    rows = [row for row in result['rows'] if row[y_field] is not None]
+    points = [(series_x(row[x_field], index), float(row[y_field])) for index, row in enumerate(rows)]
+    order = sorted(range(len(points)), key=lambda index: points[index][0])
+    points = [points[index] for index in order]
+    keep = lttb(points, max(max_points, 3))
+    sampled = [rows[order[index]] for index in keep][:max_points]
+    
+    return {
+        **result,
+        'rows': sampled,
+        'metadata': {
+            **result['metadata'],
+            'rowCount': len(sampled),
+            'reduction': {
+                'method': 'lttb',
+                'xAxis': x_field,
+                'yAxis': y_field,
+                'maxPoints': max_points,
+                'inputRows': len(result['rows']),
+                'outputRows': len(sampled),
+                'droppedNulls': len(result['rows']) - len(rows)
+            }
+        }
+    }
+
+def execute_histogram(sql, data_source_id, column, max_bins):
+    """Bin ``column`` of the query's result into at most ``max_bins`` buckets
+    
+    The bin count follows the square-root rule (sqrt of the non-null row
+    count) capped by the point budget, and empty bins are kept so the
+    chart's x axis stays continuous. Binning runs inside DuckDB, so only
+    the bins leave the database.
+    """
+    if not column:
+        raise ValueError('xAxis is required for histogram binning')
+    
+    source_sql = sql.strip().rstrip(';')
+    column = column.replace('"', '""')
+    histogram_sql = f"""
+        WITH source AS (
+            {source_sql}
+        ), vals AS (
+            SELECT CAST("{column}" AS DOUBLE) AS v FROM source WHERE "{column}" IS NOT NULL
+        ), spec AS (
+            SELECT
+                MIN(v) AS lo,
+                MAX(v) AS hi,
+                CASE
+                    WHEN MIN(v) = MAX(v) THEN 1
+                    ELSE CAST(GREATEST(1, LEAST({max_bins}, CEIL(SQRT(COUNT(*))))) AS INTEGER)
+                END AS bins
+            FROM vals
+        ), bin_ids AS (
+            SELECT UNNEST(RANGE(bins)) AS bin FROM spec
+        ), counts AS (
+            SELECT
+                LEAST(CAST(COALESCE(FLOOR((v - lo) / NULLIF(hi - lo, 0) * bins), 0) AS INTEGER), bins - 1) AS bin,
+                COUNT(*) AS count
+            FROM vals, spec
+            GROUP BY 1
+        )
+        SELECT
+            bin_ids.bin,
+            spec.lo + bin_ids.bin * (spec.hi - spec.lo) / spec.bins AS bin_start,
+            spec.lo + (bin_ids.bin + 1) * (spec.hi - spec.lo) / spec.bins AS bin_end,
+            COALESCE(counts.count, 0) AS count
+        FROM bin_ids
+        CROSS JOIN spec
+        LEFT JOIN counts ON counts.bin = bin_ids.bin
+        ORDER BY bin_ids.bin
+    """
+    
+    result = execute_query_with_metrics(histogram_sql, data_source_id)
+    rows = result['rows']
+    bin_width = rows[0]['bin_end'] - rows[0]['bin_start'] if rows and rows[0]['bin_start'] is not None else None
+    
+    result['metadata']['reduction'] = {
+        'method': 'histogram',
+        'xAxis': column.replace('""', '"'),
+        'maxPoints': max_bins,
+        'bins': len(rows),
+        'binWidth': bin_width,
+        'inputRows': sum(row['count'] for row in rows),
+        'outputRows': len(rows)
+    }
+    return result
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -79,9 +1069,9 @@ def health_check():
 def api_health():
     """Data source health check"""
     try:
-        conn = get_db_connection()
         # Test query
-        result = conn.execute("SELECT COUNT(*) as count FROM netflix_shows").fetchone()
+        with data_sources.cursor(DEFAULT_DATA_SOURCE) as cursor:
+            result = cursor.execute("SELECT COUNT(*) as count FROM netflix_shows").fetchone()
         record_count = result[0]
         
         return jsonify({
@@ -104,6 +1094,26 @@ def api_health():
             }
         }), 500
 
+@app.route('/api/datasources', methods=['GET'])
+def list_data_sources():
+    """List registered data sources"""
+    return jsonify({'dataSources': data_sources.describe()})
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Shared query cache statistics"""
+    return jsonify(shared_cache.stats())
+
+@app.route('/api/cache', methods=['DELETE'])
+def invalidate_cache():
+    """Invalidate shared query cache entries matching ?pattern= (default: all queries)"""
+    pattern = request.args.get('pattern', CACHE_KEY_PREFIX + '*')
+    try:
+        deleted = shared_cache.invalidate_pattern(pattern)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'pattern': pattern, 'deleted': deleted})
+
 @app.route('/api/query', methods=['POST'])
 def execute_query():
     """Generic query execution endpoint"""
@@ -115,25 +1125,44 @@ def execute_query():
         if not sql:
             return jsonify({'error': 'SQL query is required'}), 400
         
-        if data_source_id != 'netflix-duckdb':
-            return jsonify({'error': 'Invalid data source. Use "netflix-duckdb"'}), 400
+        if data_source_id not in data_sources.sources:
+            return jsonify({'error': f'Unknown data source: {data_source_id}'}), 400
+        
+        max_points = point_budget(data)
+        chart_type = data.get('chartType', 'line')
+        if chart_type not in ('line', 'histogram'):
+            return jsonify({'error': 'chartType must be "line" or "histogram"'}), 400
+        
+        print(f"🔍 Executing query on {data_source_id}: {sql[:100]}...")
         
-        print(f"🔍 Executing query: {sql[:100]}...")
+        hot_key = canned_cache.hot_query_key(sql) if data_source_id == DEFAULT_DATA_SOURCE else None
+        if max_points and chart_type == 'histogram':
+            result = execute_histogram(sql, data_source_id, data.get('xAxis'), max_points)
+        elif hot_key:
+            result = canned_cache.get(hot_key, sql)
+        else:
+            tenant_id = data.get('tenantId') or request.headers.get('X-Tenant-Id') or DEFAULT_TENANT_ID
+            cache_ttl = data.get('cacheTtl')
+            if not isinstance(cache_ttl, int) or isinstance(cache_ttl, bool) or cache_ttl < 1:
+                cache_ttl = None
+            result = run_shared_query(sql, data_source_id, tenant_id, data.get('parameters'), cache_ttl)
         
-        result = execute_query_with_metrics(sql)
+        if max_points and chart_type == 'line':
+            result = downsample_series(result, data.get('xAxis'), data.get('yAxis'), max_points)
         
         print(f"✅ Query completed: {result['metadata']['rowCount']} rows in {result['metadata']['executionTime']}ms")
         
         return jsonify(result)
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"❌ Query error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/netflix/content-types', methods=['GET'])
-def content_types():
-    """Get content type distribution"""
-    sql = """
+def content_types_query(args):
+    """Content type distribution"""
+    return {}, """
         SELECT 
             type,
             COUNT(*) as count,
@@ -144,20 +1173,81 @@ def content_types():
         GROUP BY type
         ORDER BY count DESC
     """
-    
+
+def encode_cursor(row):
+    """Opaque continuation token for the rating sort key of ``row``"""
+    key = [row['imdb_score'], row['imdb_votes'] or 0, row['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip('=')
+
+def decode_cursor(token):
+    """Rating sort key from a continuation token; raises ValueError if malformed"""
     try:
-        result = execute_query_with_metrics(sql)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        score, votes, show_id = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        score, votes = float(score), float(votes)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    
+    if not (math.isfinite(score) and math.isfinite(votes)):
+        raise ValueError('Invalid cursor')
+    return score, votes, str(show_id)
 
-@app.route('/api/netflix/top-rated', methods=['GET'])
-def top_rated():
-    """Get top rated content"""
-    limit = request.args.get('limit', 20)
+def page_params(args, default_size):
+    """Normalized pageSize/cursor parameters for a keyset-paginated listing"""
+    page_size = min(max(args.get('pageSize', default_size, type=int), 1), MAX_PAGE_SIZE)
+    params = {'pageSize': page_size}
+    
+    cursor = args.get('cursor')
+    if cursor:
+        decode_cursor(cursor)
+        params['cursor'] = cursor
+    return params
+
+def keyset_clause(params):
+    """Predicate and limit that seek past the cursor in rating order
+    
+    Listings are ordered by (imdb_score, imdb_votes, id) descending, the
+    order the loader writes netflix_shows in, so the leading imdb_score
+    bound lets DuckDB skip row groups and every page costs the same.
+    """
+    clause = ""
+    if 'cursor' in params:
+        score, votes, show_id = decode_cursor(params['cursor'])
+        show_id = show_id.replace("'", "''")
+        clause = f"""
+            AND imdb_score <= {score!r}
+            AND (imdb_score, COALESCE(imdb_votes, 0), id) < ({score!r}, {votes!r}, '{show_id}')"""
+    
+    # One extra row tells us whether another page exists
+    order = "ORDER BY imdb_score DESC, COALESCE(imdb_votes, 0) DESC, id DESC"
+    if 'pageSize' in params:
+        order += f"\n        LIMIT {params['pageSize'] + 1}"
+    return clause, order
+
+def paginate(params, result):
+    """Trim the look-ahead row and attach the next page's cursor"""
+    if 'pageSize' not in params:
+        return result
     
-    sql = f"""
+    rows = result['rows'][:params['pageSize']]
+    has_more = len(result['rows']) > params['pageSize']
+    return {
+        **result,
+        'rows': rows,
+        'metadata': {
+            **result['metadata'],
+            'rowCount': len(rows),
+            'nextCursor': encode_cursor(rows[-1]) if has_more else None
+        }
+    }
+
+def top_rated_query(args):
+    """Top rated content, one keyset page at a time"""
+    params = page_params(args, args.get('limit', 20, type=int))
+    clause, order = keyset_clause(params)
+    
+    return params, f"""
         SELECT 
+            id,
             title,
             type,
             release_year,
@@ -166,21 +1256,13 @@ def top_rated():
             runtime,
             age_certification
         FROM netflix_shows 
-        WHERE imdb_score IS NOT NULL
-        ORDER BY imdb_score DESC, imdb_votes DESC
-        LIMIT {limit}
+        WHERE imdb_score IS NOT NULL{clause}
+        {order}
     """
-    
-    try:
-        result = execute_query_with_metrics(sql)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/netflix/release-years', methods=['GET'])
-def release_years():
-    """Get content by release year"""
-    sql = """
+def release_years_query(args):
+    """Content by release year"""
+    return {}, """
         SELECT 
             release_year,
             COUNT(*) as total_content,
@@ -192,17 +1274,10 @@ def release_years():
         GROUP BY release_year
         ORDER BY release_year DESC
     """
-    
-    try:
-        result = execute_query_with_metrics(sql)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/netflix/age-ratings', methods=['GET'])
-def age_ratings():
-    """Get content by age rating"""
-    sql = """
+def age_ratings_query(args):
+    """Content by age rating"""
+    return {}, """
         SELECT 
             COALESCE(age_certification, 'Not Rated') as age_certification,
             COUNT(*) as content_count,
@@ -212,17 +1287,10 @@ def age_ratings():
         GROUP BY age_certification
         ORDER BY content_count DESC
     """
-    
-    try:
-        result = execute_query_with_metrics(sql)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/netflix/runtime-distribution', methods=['GET'])
-def runtime_distribution():
-    """Get runtime distribution"""
-    sql = """
+def runtime_distribution_query(args):
+    """Runtime distribution"""
+    return {}, """
         SELECT 
             CASE 
                 WHEN runtime < 30 THEN 'Short (< 30 min)'
@@ -241,20 +1309,21 @@ def runtime_distribution():
         GROUP BY runtime_category
         ORDER BY count DESC
     """
-    
-    try:
-        result = execute_query_with_metrics(sql)
-        return jsonify(result)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/netflix/highly-rated', methods=['GET'])
-def highly_rated():
-    """Get highly rated content"""
-    min_score = request.args.get('minScore', 8.0)
+def highly_rated_query(args):
+    """Highly rated content, paged when pageSize or cursor is given"""
+    min_score = args.get('minScore', 8.0, type=float)
+    if not math.isfinite(min_score):
+        raise ValueError('minScore must be a finite number')
+    
+    params = {'minScore': min_score}
+    if 'pageSize' in args or 'cursor' in args:
+        params.update(page_params(args, 50))
+    clause, order = keyset_clause(params)
     
-    sql = f"""
+    return params, f"""
         SELECT 
+            id,
             title,
             type,
             release_year,
@@ -263,50 +1332,298 @@ def highly_rated():
             imdb_score,
             imdb_votes
         FROM netflix_shows 
-        WHERE imdb_score >= {min_score}
-        ORDER BY imdb_score DESC, imdb_votes DESC
+        WHERE imdb_score >= {min_score}{clause}
+        {order}
     """
+
+# Canned endpoint name -> query builder. Builders return the normalized
+# parameters (used in the cache key) and the SQL to run.
+CANNED_QUERIES = {
+    'content-types': content_types_query,
+    'top-rated': top_rated_query,
+    'release-years': release_years_query,
+    'age-ratings': age_ratings_query,
+    'runtime-distribution': runtime_distribution_query,
+    'highly-rated': highly_rated_query,
+}
+
+def canned_key(name, params):
+    """Cache key for a canned endpoint and its normalized parameters"""
+    if not params:
+        return name
+    return f"{name}?{urlencode(sorted(params.items()))}"
+
+def serve_canned(name, args):
+    """Serve a canned endpoint from the in-memory cache
     
+    Only the default parameters are kept warm by the background refresher.
+    Other variants (custom limits, scores, page sizes and continuation
+    pages) read through the shared query cache, so arbitrary parameter
+    values can't pile up background work.
+    """
     try:
-        result = execute_query_with_metrics(sql)
-        return jsonify(result)
+        params, sql = CANNED_QUERIES[name](args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        default_params, _ = CANNED_QUERIES[name](MultiDict())
+        if params == default_params:
+            result = canned_cache.get(canned_key(name, params), sql)
+        else:
+            result = run_shared_query(sql, ttl=max(int(CANNED_REFRESH_INTERVAL), 1))
+        return jsonify(paginate(params, result))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def restore_result_store():
+    """Attach the persistent result store and seed the canned cache from it"""
+    if not RESULT_STORE_DIR:
+        return 0
+    if pa is None:
+        print("⚠️  pyarrow not installed; results will not persist across restarts")
+        return 0
+    
+    store = ResultStore(RESULT_STORE_DIR, DEFAULT_DATA_SOURCE)
+    removed = store.collect_garbage()
+    if removed:
+        print(f"🗑️  Removed cached results for {removed} old data version(s)")
+    
+    restored = 0
+    for key, sql, result in store.load():
+        canned_cache.restore(key, sql, result)
+        restored += 1
+    
+    canned_cache.store = store
+    return restored
+
+def warm_canned_cache():
+    """Load every canned endpoint (default parameters) and registered hot query"""
+    try:
+        # Connection check that used to run before accepting traffic
+        with data_sources.cursor(DEFAULT_DATA_SOURCE) as cursor:
+            record_count = cursor.execute("SELECT COUNT(*) FROM netflix_shows").fetchone()[0]
+        print(f"✅ Database connected: {record_count:,} Netflix records loaded")
+        
+        canned = {}
+        for name, build_query in CANNED_QUERIES.items():
+            params, sql = build_query(MultiDict())
+            canned[canned_key(name, params)] = sql
+        
+        # Seed from results other workers already computed, in one round trip
+        shared_keys = {
+            TwoTierCache.generate_cache_key(DEFAULT_TENANT_ID, DEFAULT_DATA_SOURCE, sql): key
+            for key, sql in canned.items()
+        }
+        for shared_key, result in shared_cache.get_many(list(shared_keys)).items():
+            key = shared_keys[shared_key]
+            canned_cache.restore(key, canned[key], result)
+        
+        for key, sql in canned.items():
+            canned_cache.register(key, sql)
+        
+        for sql in load_hot_queries():
+            canned_cache.register_hot_query(sql)
+    except Exception as e:
+        print(f"⚠️  Cache warm-up failed: {str(e)}")
+
+def resolve_stream_query(spec):
+    """Map a stream subscription entry to a (cache key, SQL, params) triple
+    
+    ``spec`` is a canned endpoint with optional parameters, such as
+    ``top-rated?limit=10``. Returns None for unknown endpoints. Streams
+    always follow the first page of paginated listings.
+    """
+    parts = urlsplit(spec)
+    name = parts.path.strip('/').split('/')[-1]
+    if name not in CANNED_QUERIES:
+        return None
+    
+    args = MultiDict(parse_qsl(parts.query))
+    args.pop('cursor', None)
+    params, sql = CANNED_QUERIES[name](args)
+    return canned_key(name, params), sql, params
+
+def compact_diff(previous_rows, rows):
+    """Positional row diff: new row count plus the rows that changed"""
+    changed = {
+        index: row for index, row in enumerate(rows)
+        if index >= len(previous_rows) or previous_rows[index] != row
+    }
+    return {'rowCount': len(rows), 'changed': changed}
+
+def parse_resume_id(value):
+    """Data version to resume after, or -1 for a full snapshot
+    
+    Only ids minted by this process (``<epoch>-<version>``) are trusted;
+    anything else, including ids from before a restart, resyncs.
+    """
+    epoch, _, version = (value or '').partition('-')
+    if epoch != BOOT_EPOCH or not version.isdigit():
+        return -1
+    return int(version)
+
+def format_sse(event, data, event_id=None):
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, default=str)}\n\n"
+
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """Push canned endpoint results to a dashboard when their data changes
+    
+    Subscribe with repeated ``endpoint`` parameters (e.g.
+    ``?endpoint=content-types&endpoint=top-rated%3Flimit%3D10``) and/or
+    registered hot query ``sql`` parameters. Event ids are
+    ``<boot epoch>-<data version>``, so a reconnecting client resumes via
+    ``Last-Event-ID`` or ``?since=``; ids from another process get a full
+    snapshot. With ``?mode=diff`` only changed rows are sent after the
+    first snapshot of each query.
+    """
+    subscriptions = {}
+    page_settings = {}
+    for spec in request.args.getlist('endpoint'):
+        try:
+            resolved = resolve_stream_query(spec)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if resolved is None:
+            return jsonify({'error': f'Unknown endpoint: {spec}'}), 400
+        key, sql, params = resolved
+        subscriptions[key] = sql
+        page_settings[key] = params
+    
+    for sql in request.args.getlist('sql'):
+        hot_key = canned_cache.hot_query_key(sql)
+        if hot_key is None:
+            return jsonify({'error': 'Only registered hot queries can be streamed'}), 400
+        subscriptions[hot_key] = sql
+    
+    if not subscriptions:
+        return jsonify({'error': 'At least one endpoint or sql parameter is required'}), 400
+    
+    since = parse_resume_id(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    
+    diff_mode = request.args.get('mode') == 'diff'
+    
+    try:
+        # Make sure every subscribed query has a cached result to compare against
+        for key, sql in subscriptions.items():
+            canned_cache.get(key, sql)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    keys = list(subscriptions)
+    canned_cache.watch(keys)
+    
+    def events():
+        last_version = since
+        sent_rows = {}
+        try:
+            yield f"retry: {int(SSE_HEARTBEAT_INTERVAL * 1000)}\n\n"
+            while True:
+                current, changed = canned_cache.changes_since(keys, last_version)
+                if last_version > current:
+                    # Newer than anything this process has issued: resync
+                    last_version = -1
+                    current, changed = canned_cache.changes_since(keys, last_version)
+                for key, (version, result) in sorted(changed.items(), key=lambda item: item[1][0]):
+                    result = paginate(page_settings.get(key, {}), result)
+                    if diff_mode and key in sent_rows:
+                        payload = {'key': key, 'version': version, 'diff': compact_diff(sent_rows[key], result['rows'])}
+                        yield format_sse('diff', payload, f"{BOOT_EPOCH}-{version}")
+                    else:
+                        payload = {'key': key, 'version': version, 'result': result}
+                        yield format_sse('result', payload, f"{BOOT_EPOCH}-{version}")
+                    sent_rows[key] = result['rows']
+                
+                last_version = max(last_version, current)
+                if not canned_cache.wait_for_change(last_version, SSE_HEARTBEAT_INTERVAL):
+                    yield ": heartbeat\n\n"
+        finally:
+            canned_cache.unwatch(keys)
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/netflix/content-types', methods=['GET'])
+def content_types():
+    """Get content type distribution"""
+    return serve_canned('content-types', request.args)
+
+@app.route('/api/netflix/top-rated', methods=['GET'])
+def top_rated():
+    """Get top rated content"""
+    return serve_canned('top-rated', request.args)
+
+@app.route('/api/netflix/release-years', methods=['GET'])
+def release_years():
+    """Get content by release year"""
+    return serve_canned('release-years', request.args)
+
+@app.route('/api/netflix/age-ratings', methods=['GET'])
+def age_ratings():
+    """Get content by age rating"""
+    return serve_canned('age-ratings', request.args)
+
+@app.route('/api/netflix/runtime-distribution', methods=['GET'])
+def runtime_distribution():
+    """Get runtime distribution"""
+    return serve_canned('runtime-distribution', request.args)
+
+@app.route('/api/netflix/highly-rated', methods=['GET'])
+def highly_rated():
+    """Get highly rated content"""
+    return serve_canned('highly-rated', request.args)
+
 if __name__ == '__main__':
     print("🎬 Starting Netflix Analytics API Server")
     print("=" * 50)
     
     try:
-        # Test database connection
-        conn = get_db_connection()
-        count_result = conn.execute("SELECT COUNT(*) FROM netflix_shows").fetchone()
-        record_count = count_result[0]
+        if DEFAULT_DATA_SOURCE not in data_sources.sources:
+            raise Exception(f"Netflix database not found in {DATA_DIR}")
         
-        print(f"✅ Database connected: {record_count:,} Netflix records loaded")
+        # Serve persisted results immediately; anything missing is loaded
+        # in the background instead of delaying startup
+        restored = restore_result_store()
+        print(f"✅ Restored {restored} cached results from the last run")
+        
+        canned_cache.start()
+        data_sources.start()
+        threading.Thread(target=warm_canned_cache, name='canned-warmup', daemon=True).start()
+        print(f"♻️  Canned results cached (refresh every ~{CANNED_REFRESH_INTERVAL:g}s, max staleness {CANNED_MAX_STALENESS:g}s)")
         print(f"🚀 Starting server on http://localhost:3001")
         print(f"\n📋 Available Endpoints:")
         print(f"  - GET  /health")
         print(f"  - GET  /api/health") 
+        print(f"  - GET  /api/datasources")
         print(f"  - POST /api/query")
+        print(f"  - GET  /api/cache/stats")
+        print(f"  - DELETE /api/cache?pattern=query:*")
         print(f"  - GET  /api/netflix/content-types")
         print(f"  - GET  /api/netflix/top-rated?limit=10")
         print(f"  - GET  /api/netflix/release-years")
         print(f"  - GET  /api/netflix/age-ratings")
         print(f"  - GET  /api/netflix/runtime-distribution")
-        print(f"  - GET  /api/netflix/highly-rated?minScore=8.5")
+        print(f"  - GET  /api/netflix/highly-rated?minScore=8.5&pageSize=50&cursor=<nextCursor>")
+        print(f"  - GET  /api/stream?endpoint=content-types&endpoint=release-years")
         
         print(f"\n🧪 Test Commands:")
         print(f"  curl http://localhost:3001/health")
         print(f"  curl http://localhost:3001/api/netflix/content-types")
         print(f"  curl -X POST http://localhost:3001/api/query \\")
         print(f"    -H 'Content-Type: application/json' \\")
-        print(f"    -d '{\"sql\": \"SELECT title, imdb_score FROM netflix_shows WHERE imdb_score > 9.0 ORDER BY imdb_score DESC LIMIT 5\", \"dataSourceId\": \"netflix-duckdb\"}'")
+        print("    -d '{\"sql\": \"SELECT title, imdb_score FROM netflix_shows WHERE imdb_score > 9.0 ORDER BY imdb_score DESC LIMIT 5\", \"dataSourceId\": \"netflix-duckdb\"}'")
         
         print(f"\n🎉 Real DaaS services ready with Netflix data!")
         
         # Start Flask server
-        app.run(host='0.0.0.0', port=3001, debug=False)
+        app.run(host='0.0.0.0', port=3001, debug=False, threaded=True)
         
     except Exception as e:
         print(f"❌ Failed to start server: {e}")
@@ -0,0 +1,15 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+API_PATH = Path(__file__).resolve().parent.parent / 'start-netflix-api.py'
+
+
+@pytest.fixture(scope='module')
+def api():
+    """start-netflix-api.py loaded as a module (the file name isn't importable)"""
+    spec = importlib.util.spec_from_file_location('netflix_api', API_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
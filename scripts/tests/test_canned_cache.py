@@ -0,0 +1,56 @@
+"""Background refresh tests for CannedResultCache in start-netflix-api.py"""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def runs(api, monkeypatch):
+    """Replace the shared query path with a counter whose result changes every run"""
+    calls = []
+
+    def run_shared_query(sql, ttl=None):
+        calls.append(sql)
+        return {'rows': [{'run': len(calls)}], 'columns': [], 'metadata': {}}
+
+    monkeypatch.setattr(api, 'run_shared_query', run_shared_query)
+    return calls
+
+
+@pytest.fixture
+def canned(api):
+    cache = api.CannedResultCache(refresh_interval=0.1, max_staleness=60, jitter=0, max_unpinned=10)
+    yield cache
+    cache.stop()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_scheduler_refreshes_without_result_store(canned, runs):
+    assert canned.store is None
+    canned.register('k', 'select 1')
+    version = canned.get('k', 'select 1')['metadata']['dataVersion']
+
+    canned.start()
+    assert wait_for(lambda: len(runs) >= 3)
+    assert canned.get('k', 'select 1')['metadata']['dataVersion'] > version
+    assert canned._scheduler.is_alive()
+
+
+def test_scheduler_evicts_idle_unpinned_entries_without_result_store(api, runs):
+    cache = api.CannedResultCache(refresh_interval=0.1, max_staleness=0.2, jitter=0, max_unpinned=10)
+    try:
+        cache.get('idle', 'select 2')
+        cache.start()
+        assert wait_for(lambda: 'idle' not in cache._entries)
+        assert cache._scheduler.is_alive()
+    finally:
+        cache.stop()
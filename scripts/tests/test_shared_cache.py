@@ -0,0 +1,114 @@
+"""Shared query cache tests for start-netflix-api.py, against fakeredis"""
+
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+class CountingRedis(fakeredis.FakeRedis):
+    """FakeRedis that records how many round trips the cache makes"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pipelines = 0
+        self.single_gets = 0
+
+    def pipeline(self, *args, **kwargs):
+        self.pipelines += 1
+        return super().pipeline(*args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        self.single_gets += 1
+        return super().get(*args, **kwargs)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def make_cache(api, server, memory_ttl=5):
+    return api.TwoTierCache(CountingRedis(server=server), 3600, memory_ttl, 100)
+
+
+# Keys produced by CacheService.generateCacheKey in Node for the same input
+@pytest.mark.parametrize('tenant_id, data_source_id, sql, parameters, expected', [
+    ('default', 'netflix-duckdb', 'SELECT  *\n FROM netflix_shows', None, 'query:qq3xc4'),
+    ('t1', 'ds', 'select 1', {}, 'query:gtagrl'),
+    ('t1', 'ds', 'SELECT ünïcødé 😀 𝔘 FROM x',
+     {'a': 1.0, 'b': [1.5, 'x', None, True], 'c': {'d': 'é'}}, 'query:hfst7i'),
+    ('default', 'netflix-duckdb', 'SELECT * FROM netflix_shows WHERE score >= $minScore',
+     {'minScore': 7.0}, 'query:8oqn0z'),
+])
+def test_cache_key_matches_query_engine(api, tenant_id, data_source_id, sql, parameters, expected):
+    assert api.TwoTierCache.generate_cache_key(tenant_id, data_source_id, sql, parameters) == expected
+
+
+def test_integral_float_parameters_share_a_key(api):
+    as_float = api.TwoTierCache.generate_cache_key('t1', 'ds', 'select 1', {'limit': 10.0})
+    as_int = api.TwoTierCache.generate_cache_key('t1', 'ds', 'select 1', {'limit': 10})
+    assert as_float == as_int
+
+
+# simpleHash in Node hashes UTF-16 code units and wraps at 32 bits
+@pytest.mark.parametrize('text, expected', [
+    ('', '0'),
+    ('é', '6h'),
+    ('😀', '11zz7'),
+    ('Amélie (2001) — 🎬 𝔘', 'sg3yu6'),
+    ('x' * 1000, 'sdbd34'),
+])
+def test_simple_hash_matches_query_engine(api, text, expected):
+    assert api.js_simple_hash(text) == expected
+
+
+def test_get_many_and_set_many_use_one_pipeline(api, server):
+    writer = make_cache(api, server)
+    reader = make_cache(api, server)
+    results = {f'query:{index}': {'rows': [{'n': index}], 'columns': [], 'metadata': {}} for index in range(5)}
+
+    writer.set_many(results, ttl=60)
+    assert writer.client.pipelines == 1
+
+    found = reader.get_many(list(results) + ['query:missing'])
+    assert found == results
+    assert reader.client.pipelines == 1
+    assert reader.client.single_gets == 0
+
+    # The second lookup is served from the memory tier
+    assert reader.get_many(list(results)) == results
+    assert reader.client.pipelines == 1
+
+    stats = reader.stats()
+    assert stats['hits'] == 5
+    assert stats['sets'] == 5
+
+
+def test_shared_values_use_json_stringify_encoding(api, server):
+    cache = make_cache(api, server, memory_ttl=0)
+    cache.set('query:a', {'rows': [{'score': 102.0, 'avg': 7.5}]}, ttl=60)
+
+    assert cache.client.get('query:a') == b'{"rows":[{"score":102,"avg":7.5}]}'
+    assert cache.get('query:a') == {'rows': [{'score': 102, 'avg': 7.5}]}
+
+
+def test_invalidate_pattern_deletes_matching_queries_only(api, server):
+    cache = make_cache(api, server)
+    other = fakeredis.FakeRedis(server=server)
+    cache.set_many({'query:a1': {'rows': []}, 'query:a2': {'rows': []}, 'query:b1': {'rows': []}})
+    other.set('session:42', 'x')
+
+    assert cache.invalidate_pattern('query:a*') == 2
+    assert cache.get('query:a1') is None
+    assert cache.get('query:b1') == {'rows': []}
+
+    assert cache.invalidate_pattern('query:*') == 1
+    assert other.get('session:42') == b'x'
+    assert other.get('cache:sets') == b'3'
+
+
+@pytest.mark.parametrize('pattern', ['*', 'cache:*', 'query*'])
+def test_invalidate_pattern_rejects_non_query_patterns(api, server, pattern):
+    cache = make_cache(api, server)
+    with pytest.raises(ValueError):
+        cache.invalidate_pattern(pattern)
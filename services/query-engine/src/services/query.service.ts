@@ -98,9 +98,10 @@ export class QueryService {
       let cacheKey: string | undefined
       if (request.useCache !== false) {
         cacheKey = this.cache.generateCacheKey(
+          request.tenantId || 'default',
           request.dataSourceId,
           request.sql,
-          request.parameters || {}
+          request.parameters
         )
 
         const cachedResult = await this.cache.get(cacheKey)